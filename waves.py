@@ -1,7 +1,7 @@
 import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
-import soundfile as sf
-from scipy import signal
 
 # Set the output folder path
 output_folder = 'samples_folder'
@@ -9,20 +9,89 @@ output_folder = 'samples_folder'
 # Create the output folder if it doesn't exist
 os.makedirs(output_folder, exist_ok=True)
 
+sample_rate = 44100
+duration = 1  # seconds
+num_samples = sample_rate * duration
+
+# Sample indices, shared by every file since rate and duration are fixed
+sample_index = np.arange(num_samples, dtype=np.uint32)
+
+# Number of consecutive files of one shape rendered together as a 2-D array
+block_size = 16
+
+# Number of consecutive files of one shape handed to a worker process at once
+files_per_task = 64
+
+# Two output buffers, allocated once per process: one block is rendered into
+# one buffer while the writer thread is still saving the other
+sample_buffers = np.empty((2, block_size, num_samples), dtype=np.float32)
+
+# Scratch space for the integer phase and the complex sine phasor, also
+# allocated once per process and reused for every block
+phase_buffer = np.empty((block_size, num_samples), dtype=np.uint32)
+phasor_buffer = np.empty((block_size, num_samples), dtype=np.complex64)
+
+# Frequency of every MIDI note up to 148, the highest any bank uses
+note_frequencies = 440 * (2 ** ((np.arange(149) - 69) / 12))
+
 def midi_note_to_frequency(midi_note):
-    return 440 * (2 ** ((midi_note - 69) / 12))
+    return note_frequencies[midi_note]
 
-def generate_sample(file_number, waveform_shape):
-    # Generate a waveform for the sample
-    sample_rate = 44100
-    duration = 1  # seconds
+def sine_wave(frequencies, out):
+    # Build e^(i*w*n) for every row at once by repeated doubling: each pass fills
+    # the next columns with the filled prefix rotated by its length, so only
+    # log2(N) exp() calls are needed per row
+    steps = 2 * np.pi * frequencies[:, np.newaxis] / sample_rate
+    phasor = phasor_buffer[:len(out)]
+    phasor[:, 0] = 1
+    length = out.shape[1]
+    filled = 1
+    while filled < length:
+        count = min(filled, length - filled)
+        rotation = np.exp(1j * steps * filled).astype(np.complex64)
+        np.multiply(phasor[:, :count], rotation, out=phasor[:, filled:filled + count])
+        filled += count
+    np.copyto(out, phasor.imag)
 
-    # Convert file number to string format with leading zeros if needed
-    file_number_str = str(file_number).zfill(4)
+def render_waveform(waveform_shape, frequencies, out):
+    # Fill the float32 array out, one row per frequency, without allocating a new output
+    if waveform_shape == 'noise':
+        # Fresh generator per block: forked workers would otherwise share the same global RNG state
+        np.random.default_rng().random(dtype=np.float32, out=out)
+        out *= 2
+        out -= 1
+    elif waveform_shape == 'sine':
+        sine_wave(frequencies, out)
+    else:
+        # Integer phase accumulator: 2**32 is one full cycle, so the phase of
+        # sample n is n * increment and wraps for free in uint32 arithmetic
+        increments = (np.round(frequencies / sample_rate * 2 ** 32) % 2 ** 32).astype(np.uint32)
+        phase = phase_buffer[:len(out)]
+        np.multiply.outer(increments, sample_index, out=phase)
 
-    # Define the filename based on file number and waveform shape
-    filename = f"{file_number_str}_L1_{waveform_shape}.wav"
+        if waveform_shape == 'square':
+            # High for the first half of the cycle, i.e. while the phase is below 2**31
+            np.greater_equal(phase, 2 ** 31, out=out)
+            out *= -2
+            out += 1
+        else:
+            # The top 24 bits of the phase convert to float32 exactly. Their
+            # 2**-24 scale to cycles is folded into each formula's constants,
+            # so every step is a single in-place pass over out
+            phase >>= 8
+            np.copyto(out, phase)
+            if waveform_shape == 'sawtooth':
+                # 2 * cycle - 1
+                out *= 2.0 ** -23
+                out -= 1
+            else:
+                # 1 - 4 * |cycle - 0.5|
+                out -= 2 ** 23
+                np.abs(out, out=out)
+                out *= -(2.0 ** -22)
+                out += 1
 
+def sample_frequency(file_number, waveform_shape):
     # Calculate frequency based on file number and waveform shape
     if waveform_shape == 'sine':
         cycle_index = (file_number - 1) % 128
@@ -44,27 +113,65 @@ def generate_sample(file_number, waveform_shape):
         frequency = np.random.uniform(20, 20000)  # Random frequency between 20 Hz and 20 kHz
     else:
         raise ValueError(f"Unknown waveform shape: {waveform_shape}")
+    return frequency
 
-    # Generate waveform based on waveform_shape and frequency
-    t = np.arange(sample_rate * duration)
-    if waveform_shape == 'sine':
-        waveform = np.sin(2 * np.pi * frequency * t / sample_rate)
-    elif waveform_shape == 'sawtooth':
-        waveform = signal.sawtooth(2 * np.pi * frequency * t / sample_rate)
-    elif waveform_shape == 'square':
-        waveform = signal.square(2 * np.pi * frequency * t / sample_rate)
-    elif waveform_shape == 'triangle':
-        waveform = signal.sawtooth(2 * np.pi * frequency * t / sample_rate, width=0.5)
-    elif waveform_shape == 'noise':
-        waveform = np.random.uniform(-1, 1, sample_rate * duration)
-    else:
-        raise ValueError(f"Unknown waveform shape: {waveform_shape}")
+def sample_path(file_number, waveform_shape):
+    # Convert file number to string format with leading zeros if needed
+    file_number_str = str(file_number).zfill(4)
+
+    # Define the filename based on file number and waveform shape
+    filename = f"{file_number_str}_L1_{waveform_shape}.wav"
+    return os.path.join(output_folder, filename)
+
+def wav_header(num_frames):
+    # Canonical 44-byte RIFF header for mono 16-bit PCM at sample_rate
+    data_size = num_frames * 2
+    return struct.pack('<4sI4s4sIHHIIHH4sI',
+                       b'RIFF', 36 + data_size, b'WAVE',
+                       b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+                       b'data', data_size)
 
-    # Convert the waveform to float32
-    waveform = waveform.astype(np.float32)
+def write_wav(path, pcm):
+    with open(path, 'wb') as f:
+        f.write(wav_header(len(pcm)))
+        f.write(pcm.tobytes())
 
-    # Create the WAV file
-    sf.write(os.path.join(output_folder, filename), waveform, sample_rate, format='WAV', subtype='PCM_16')
+def write_block(paths, block):
+    # Scale to 16-bit the way libsndfile did: full scale is 32768, values are
+    # floored, and +1.0 is clipped to 32767. Done in place, the block is not
+    # read again until it is rendered over
+    block *= 32768
+    np.floor(block, out=block)
+    np.clip(block, -32768, 32767, out=block)
+
+    # Create the WAV files, one per row
+    for path, samples in zip(paths, block):
+        write_wav(path, samples.astype('<i2'))
+
+def generate_files(waveform_shape, file_numbers):
+    # Every path of the run is known up front, so format them all once
+    paths = [sample_path(file_number, waveform_shape) for file_number in file_numbers]
+
+    # Render the files one block at a time. A writer thread saves each block
+    # while the next one is rendered, so disk writes overlap with the math
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        writes = []
+        for block_index, block_start in enumerate(range(0, len(file_numbers), block_size)):
+            block_numbers = file_numbers[block_start:block_start + block_size]
+            block = sample_buffers[block_index % 2, :len(block_numbers)]
+
+            # The writer must be done with this buffer before it is overwritten
+            if block_index >= 2:
+                writes[block_index - 2].result()
+
+            # Generate all waveforms of the block with one set of array operations
+            frequencies = np.array([sample_frequency(file_number, waveform_shape) for file_number in block_numbers])
+            render_waveform(waveform_shape, frequencies, block)
+            block_paths = paths[block_start:block_start + block_size]
+            writes.append(writer.submit(write_block, block_paths, block))
+
+        for write in writes:
+            write.result()
 
 # Define the waveform shapes
 waveform_shapes = ['sine', 'sawtooth', 'square', 'triangle', 'noise']
@@ -72,11 +179,22 @@ waveform_shapes = ['sine', 'sawtooth', 'square', 'triangle', 'noise']
 # Define the number of files per waveform shape
 files_per_waveform = 128
 
-# Generate samples for each waveform shape
-for waveform_shape in waveform_shapes:
-    start_file = (waveform_shapes.index(waveform_shape) * files_per_waveform) + 1
-    end_file = start_file + files_per_waveform
-    for file_number in range(start_file, end_file):
-        generate_sample(file_number, waveform_shape)
+def main():
+    # Split every waveform shape into runs of consecutive file numbers
+    shapes = []
+    tasks = []
+    for waveform_shape in waveform_shapes:
+        start_file = (waveform_shapes.index(waveform_shape) * files_per_waveform) + 1
+        end_file = start_file + files_per_waveform
+        for task_start in range(start_file, end_file, files_per_task):
+            shapes.append(waveform_shape)
+            tasks.append(range(task_start, min(task_start + files_per_task, end_file)))
+
+    # Every run is independent, so spread them across all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(generate_files, shapes, tasks))
+
+    print("Samples generated successfully.")
 
-print("Samples generated successfully.")
+if __name__ == '__main__':
+    main()